@@ -1,11 +1,15 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import Optional, Tuple
-from computer_control import ComputerControl
+from controller_service import ControllerClient, connect_controller
+from tracing import tracer
+import logging
 import uvicorn
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Computer Control API")
-computer = ComputerControl()
+computer = connect_controller()
 
 class MousePosition(BaseModel):
     x: int
@@ -38,10 +42,30 @@ async def get_screenshot():
             "message": str(e)
         }
 
+@app.get("/screenshot/foveated")
+async def get_foveated_screenshot():
+    """Get a low-quality full-screen base layer plus full-quality patches
+    around the cursor and the most recently changed region"""
+    try:
+        frame = computer.get_foveated_frame()
+        return {
+            "success": True,
+            "message": "Foveated screenshot captured successfully",
+            "data": frame
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
 @app.get("/screen/size")
 async def get_screen_size():
     """Get screen dimensions"""
-    size = computer.get_screen_size()
+    try:
+        size = computer.get_screen_size()
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to get screen size")
     return {"width": size[0], "height": size[1]}
 
 @app.post("/mouse/move")
@@ -98,8 +122,28 @@ async def type_text(text_data: TextInput):
 @app.get("/mouse/position")
 async def get_cursor_position():
     """Get current cursor position"""
-    position = computer.get_cursor_position()
+    try:
+        position = computer.get_cursor_position()
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to get cursor position")
     return {"x": position[0], "y": position[1]}
 
+@app.get("/trace")
+async def get_trace(clear: bool = False):
+    """Export recorded spans as Chrome/Perfetto trace JSON"""
+    trace = tracer.export_chrome_trace()
+    # Include spans from the shared controller process when connected to one
+    if isinstance(computer, ControllerClient):
+        try:
+            trace["traceEvents"] += computer.export_chrome_trace(clear)["traceEvents"]
+        except Exception as e:
+            # Still return the local spans if the service has gone away
+            logger.warning("Failed to fetch controller service spans: %s", e)
+    # Clear only once the response is built, so a failure above cannot lose spans
+    if clear:
+        tracer.clear()
+    return trace
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,81 @@
+"""Compare full-frame and foveated screen encoding on synthetic frames.
+
+Usage: python bench_foveation.py [--width 1920] [--height 1080] [--runs 20]
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+from foveation import change_signature, encode_foveated, encode_jpeg, find_changed_region
+
+
+def synthetic_desktop(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Build a desktop-like BGR frame: gradient wallpaper, windows and text"""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(60, 160, width, dtype=np.uint8)
+    frame = np.dstack([np.tile(gradient, (height, 1))] * 3)
+    frame[..., 0] = np.flipud(frame[..., 0])
+    for _ in range(6):
+        x, y = int(rng.integers(0, width - 400)), int(rng.integers(0, height - 300))
+        w, h = int(rng.integers(300, 800)), int(rng.integers(200, 600))
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (240, 240, 240), -1)
+        cv2.rectangle(frame, (x, y), (x + w, y + 28), tuple(int(c) for c in rng.integers(0, 255, 3)), -1)
+        for line in range(y + 50, min(y + h, height) - 10, 22):
+            cv2.putText(frame, "The quick brown fox jumps over the lazy dog 0123456789",
+                        (x + 10, line), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (20, 20, 20), 1)
+    return frame
+
+
+def apply_activity(frame: np.ndarray, seed: int) -> np.ndarray:
+    """Redraw a small region, standing in for a UI update between captures"""
+    rng = np.random.default_rng(seed)
+    height, width = frame.shape[:2]
+    changed = frame.copy()
+    x, y = int(rng.integers(0, width - 300)), int(rng.integers(0, height - 120))
+    cv2.rectangle(changed, (x, y), (x + 300, y + 120), (255, 255, 255), -1)
+    cv2.putText(changed, "Updated %d" % seed, (x + 10, y + 60),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 200), 2)
+    return changed
+
+
+def bench(name: str, encode, frames) -> None:
+    sizes, times = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        size = encode(frame)
+        times.append(time.perf_counter() - start)
+        sizes.append(size)
+    print("%-10s %10.0f bytes %8.2f ms" % (name, np.mean(sizes), np.mean(times) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    desktop = synthetic_desktop(args.width, args.height)
+    frames = [apply_activity(desktop, seed) for seed in range(args.runs)]
+    cursors = [(int(x), int(y)) for x, y in np.random.default_rng(1).integers(
+        0, (args.width, args.height), size=(args.runs, 2))]
+
+    # Current path: whole screen at quality 60, sizes measured on the base64 payload
+    bench("full", lambda frame: len(encode_jpeg(frame, 60)), frames)
+
+    # Foveated path, including the change detection done at capture time
+    scale, threshold = 8, 25
+    previous = change_signature(desktop, scale)
+    state = iter(cursors)
+
+    def foveated(frame):
+        signature = change_signature(frame, scale)
+        changed = find_changed_region(previous, signature, scale, threshold)
+        result = encode_foveated(frame, next(state), changed)
+        return len(result["base"]) + sum(len(p["image"]) for p in result["patches"])
+
+    bench("foveated", foveated, frames)
+
+
+if __name__ == "__main__":
+    main()
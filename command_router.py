@@ -2,11 +2,13 @@ import subprocess
 import platform
 import os
 from typing import Optional, Dict, Any
+from tracing import tracer
 
 class CommandRouter:
     def __init__(self):
         self.is_windows = platform.system().lower() == "windows"
         
+    @tracer.traced("run_bash", "command")
     def run_bash(self, command: str) -> Dict[str, Any]:
         """Run a command in WSL bash"""
         try:
@@ -31,6 +33,7 @@ class CommandRouter:
                 "return_code": -1
             }
 
+    @tracer.traced("run_powershell", "command")
     def run_powershell(self, command: str) -> Dict[str, Any]:
         """Run a command in PowerShell"""
         try:
@@ -1,4 +1,5 @@
 import subprocess
+import functools
 from typing import List, Optional, Tuple
 import pyautogui
 import win32gui
@@ -12,43 +13,39 @@ import base64
 import json
 import os
 import logging
+from tracing import tracer
+from foveation import change_signature, encode_foveated, find_changed_region, DEFAULT_SETTINGS
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Logging is configured by the entry point; debug output here is lazy and level-gated
 logger = logging.getLogger(__name__)
 
-class ComputerControl:
-    def __init__(self):
-        # Load config from desktop
-        config_path = os.path.expanduser("~/Desktop/mcp_config.json")
+# Default config location, shared by every front end and watched for changes
+CONFIG_PATH = os.path.expanduser("~/Desktop/mcp_config.json")
+
+def _input_action(func):
+    """Drop the cached capture after an input action so later screenshots reflect it"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
         try:
-            with open(config_path, 'r') as f:
-                self.config = json.load(f)
-        except Exception:
-            # Default config if file not found or invalid
-            self.config = {
-                "pyautogui_settings": {"FAILSAFE": True},
-                "screen_settings": {
-                    "width": win32api.GetSystemMetrics(0),
-                    "height": win32api.GetSystemMetrics(1)
-                },
-                "mouse_settings": {
-                    "movement_duration": 0.1,
-                    "click_delay": 0.1
-                },
-                "keyboard_settings": {
-                    "type_delay": 0.05,  # Increased base delay
-                    "key_interval": 0.02  # Added minimum interval between keys
-                }
-            }
+            return func(self, *args, **kwargs)
+        finally:
+            self._invalidate_frame()
+    return wrapper
 
-        # Configure PyAutoGUI settings
-        pyautogui.FAILSAFE = self.config["pyautogui_settings"]["FAILSAFE"]
-        # Get screen resolution from config or system
-        self.screen_width = self.config["screen_settings"]["width"]
-        self.screen_height = self.config["screen_settings"]["height"]
+class ComputerControl:
+    def __init__(self, config_path: str = CONFIG_PATH):
+        self.config_path = config_path
         # Track mouse state
         self.is_mouse_down = False
+        # Change tracking between captures for foveated encoding
+        self._last_signature = None
+        self._last_change = None
+        # Most recent capture and its encoding, reused within frame_cache_ttl until the next input
+        self._frame = None
+        self._frame_time = 0.0
+        self._encoded = (None, None, None)
+
+        self.apply_config(self.load_config())
         
         # Enhanced key mapping with explicit mappings for special keys
         self.key_mapping = {
@@ -81,21 +78,134 @@ class ComputerControl:
             "Space": "space"
         }
         
-        logger.debug(f"Screen dimensions: {self.screen_width}x{self.screen_height}")
-        
+    def _read_config_file(self) -> dict:
+        """Read the config file, raising if it is missing or invalid"""
+        with open(self.config_path, 'r') as f:
+            return json.load(f)
+
+    def load_config(self) -> dict:
+        """Load config from desktop, falling back to defaults"""
+        try:
+            return self._read_config_file()
+        except Exception:
+            # Default config if file not found or invalid
+            return {
+                "pyautogui_settings": {"FAILSAFE": True},
+                "screen_settings": {
+                    "width": win32api.GetSystemMetrics(0),
+                    "height": win32api.GetSystemMetrics(1),
+                    "jpeg_quality": 60,
+                    "frame_cache_ttl": 0.25  # Seconds a capture is reused until the next input; 0 disables reuse
+                },
+                "mouse_settings": {
+                    "movement_duration": 0.1,
+                    "click_delay": 0.1
+                },
+                "keyboard_settings": {
+                    "type_delay": 0.05,  # Increased base delay
+                    "key_interval": 0.02  # Added minimum interval between keys
+                }
+            }
+
+    def apply_config(self, config: dict):
+        """Apply config in place; delays are read per action so they take effect immediately"""
+        # Read required settings first so an incomplete config leaves the current one untouched
+        failsafe = config["pyautogui_settings"]["FAILSAFE"]
+        screen_settings = config["screen_settings"]
+        screen_width, screen_height = screen_settings["width"], screen_settings["height"]
+        for section in ("mouse_settings", "keyboard_settings"):
+            if section not in config:
+                raise KeyError(section)
+        self.config = config
+
+        # Configure tracing from optional trace settings
+        trace_settings = self.config.get("trace_settings", {})
+        tracer.configure(
+            enabled=trace_settings.get("enabled"),
+            capacity=trace_settings.get("capacity")
+        )
+
+        # Configure PyAutoGUI settings
+        pyautogui.FAILSAFE = failsafe
+        # Get screen resolution from config or system
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.jpeg_quality = screen_settings.get("jpeg_quality", 60)
+        self.frame_cache_ttl = screen_settings.get("frame_cache_ttl", 0.25)
+        # Foveated encoding settings
+        self.foveation_settings = {**DEFAULT_SETTINGS, **self.config.get("foveation_settings", {})}
+
+        logger.debug("Screen dimensions: %dx%d", self.screen_width, self.screen_height)
+
+    def reload_config(self) -> bool:
+        """Re-read the config file and apply it without restarting"""
+        try:
+            # Unlike load_config, keep the current settings if the file is unreadable
+            self.apply_config(self._read_config_file())
+            logger.info("Reloaded config from %s", self.config_path)
+            return True
+        except Exception as e:
+            logger.error("Config reload failed: %s", e)
+            return False
+
     def get_screen_frame(self) -> str:
         """Capture current screen frame and return as base64 JPEG"""
         try:
+            frame = self._capture_frame()
+            # Reuse the encoding when another caller already encoded this capture
+            cached_frame, cached_quality, cached = self._encoded
+            if cached_frame is frame and cached_quality == self.jpeg_quality:
+                return cached
+            with tracer.span("encode", "screen"):
+                # Encode as JPEG
+                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                # Convert to base64
+                encoded = base64.b64encode(buffer).decode('utf-8')
+            self._encoded = (frame, self.jpeg_quality, encoded)
+            return encoded
+        except Exception as e:
+            return str(e)
+
+    def get_foveated_frame(self) -> dict:
+        """Capture screen as a low-quality base layer plus full-quality patches
+        around the cursor and the most recently changed region"""
+        frame = self._capture_frame()
+        with tracer.span("encode_foveated", "screen"):
+            return encode_foveated(
+                frame,
+                self.get_cursor_position(),
+                self._last_change,
+                self.foveation_settings
+            )
+
+    def _capture_frame(self) -> np.ndarray:
+        """Grab the screen as a BGR array and update the most recent changed region"""
+        now = time.monotonic()
+        if self._frame is not None and now - self._frame_time < self.frame_cache_ttl:
+            return self._frame
+        with tracer.span("capture", "screen"):
             # Capture screen using PIL
             screen = ImageGrab.grab(bbox=(0, 0, self.screen_width, self.screen_height))
             # Convert to numpy array for OpenCV
             frame = cv2.cvtColor(np.array(screen), cv2.COLOR_RGB2BGR)
-            # Encode as JPEG
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 60])
-            # Convert to base64
-            return base64.b64encode(buffer).decode('utf-8')
-        except Exception as e:
-            return str(e)
+        with tracer.span("detect_change", "screen"):
+            scale = self.foveation_settings["change_scale"]
+            signature = change_signature(frame, scale)
+            changed = find_changed_region(
+                self._last_signature, signature, scale,
+                self.foveation_settings["change_threshold"]
+            )
+            # Keep the previous region when nothing moved since the last capture
+            if changed is not None:
+                self._last_change = changed
+            self._last_signature = signature
+        self._frame, self._frame_time = frame, now
+        return frame
+
+    def _invalidate_frame(self):
+        """Forget the cached capture so the next screenshot grabs the screen again"""
+        self._frame = None
+        self._encoded = (None, None, None)
 
     def get_screen_size(self) -> Tuple[int, int]:
         """Get screen dimensions"""
@@ -103,18 +213,15 @@ class ComputerControl:
 
     def _scale_coordinates(self, x: int, y: int) -> Tuple[int, int]:
         """Process coordinates and ensure they stay within screen bounds"""
-        # Log the coordinates
-        logger.debug(f"Processing coordinates:")
-        logger.debug(f"Input coordinates: ({x}, {y})")
-        
         # Ensure coordinates stay within screen bounds with padding
         PADDING = 10  # Pixels from screen edge
         bounded_x = max(PADDING, min(x, self.screen_width - PADDING))
         bounded_y = max(PADDING, min(y, self.screen_height - PADDING))
         
-        logger.debug(f"Bounded coordinates: ({bounded_x}, {bounded_y})")
+        logger.debug("Bounded coordinates: (%d, %d) -> (%d, %d)", x, y, bounded_x, bounded_y)
         return bounded_x, bounded_y
 
+    @_input_action
     def _focus_window(self, window_title: str = None) -> bool:
         """Focus window by title, or game window if no title provided"""
         try:
@@ -138,33 +245,39 @@ class ComputerControl:
         except Exception:
             return False
 
+    @tracer.traced("mouse_move", "input")
+    @_input_action
     def mouse_move(self, x: int, y: int) -> bool:
         """Move mouse to specified coordinates"""
         try:
             x, y = self._scale_coordinates(x, y)
-            logger.debug(f"Moving mouse to: ({x}, {y})")
+            logger.debug("Moving mouse to: (%d, %d)", x, y)
             if self.is_mouse_down:
                 pyautogui.dragTo(x, y, duration=self.config["mouse_settings"]["movement_duration"])
             else:
                 pyautogui.moveTo(x, y, duration=self.config["mouse_settings"]["movement_duration"])
             return True
         except Exception as e:
-            logger.error(f"Mouse move failed: {str(e)}")
+            logger.error("Mouse move failed: %s", e)
             return False
 
+    @tracer.traced("mouse_click", "input")
+    @_input_action
     def mouse_click(self, button: str = "left") -> bool:
         """Click the specified mouse button"""
         try:
-            current_x, current_y = win32gui.GetCursorPos()
-            logger.debug(f"Clicking at position: ({current_x}, {current_y})")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Clicking at position: %s", win32gui.GetCursorPos())
             
             # Use pyautogui's click instead of win32api.mouse_event
             pyautogui.click(button=button)
             return True
         except Exception as e:
-            logger.error(f"Mouse click error: {str(e)}")
+            logger.error("Mouse click error: %s", e)
             return False
 
+    @tracer.traced("double_click", "input")
+    @_input_action
     def double_click(self, x: int = None, y: int = None) -> bool:
         """Perform a double click at current or specified coordinates"""
         try:
@@ -172,16 +285,18 @@ class ComputerControl:
             if x is not None and y is not None:
                 self.mouse_move(x, y)
             
-            current_x, current_y = win32gui.GetCursorPos()
-            logger.debug(f"Double clicking at position: ({current_x}, {current_y})")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Double clicking at position: %s", win32gui.GetCursorPos())
             
             # Use pyautogui's doubleClick
             pyautogui.doubleClick()
             return True
         except Exception as e:
-            logger.error(f"Double click failed: {str(e)}")
+            logger.error("Double click failed: %s", e)
             return False
 
+    @tracer.traced("mouse_up", "input")
+    @_input_action
     def mouse_up(self, button: str = "left") -> bool:
         """Release the specified mouse button"""
         try:
@@ -194,29 +309,26 @@ class ComputerControl:
         except Exception:
             return False
 
+    @tracer.traced("key_press", "input")
+    @_input_action
     def key_press(self, key: str) -> bool:
         """Press a keyboard key"""
         try:
             # Set base delay for PyAutoGUI
             pyautogui.PAUSE = self.config["keyboard_settings"]["type_delay"]
             
-            # Log the incoming key press
-            logger.debug(f"Processing key press: {key}")
-            
             # Map special keys from DOM to pyautogui format
             mapped_key = self.key_mapping.get(key, key.lower())
-            logger.debug(f"Mapped key '{key}' to '{mapped_key}'")
+            logger.debug("Mapped key '%s' to '%s'", key, mapped_key)
             
             # Add small delay before key press to prevent buffering issues
             time.sleep(self.config["keyboard_settings"]["key_interval"])
             
             # Handle special keys
             if mapped_key == 'enter':
-                logger.debug("Pressing Enter key")
                 pyautogui.press('enter')
                 time.sleep(0.1)  # Add small delay after Enter
             elif mapped_key in ['backspace', 'tab']:
-                logger.debug(f"Pressing special key: {mapped_key}")
                 pyautogui.press(mapped_key)
             else:
                 # Handle regular keys with synchronous press
@@ -224,12 +336,13 @@ class ComputerControl:
                 # Ensure key is processed before continuing
                 time.sleep(self.config["keyboard_settings"]["key_interval"])
             
-            logger.debug(f"Key press completed: {mapped_key}")
             return True
         except Exception as e:
-            logger.error(f"Key press error for key '{key}': {str(e)}")
+            logger.error("Key press error for key '%s': %s", key, e)
             return False
 
+    @tracer.traced("key_combination", "input")
+    @_input_action
     def key_combination(self, key: str, ctrl: bool = False, alt: bool = False, shift: bool = False) -> bool:
         """Press a key combination with modifiers"""
         try:
@@ -243,9 +356,9 @@ class ComputerControl:
                 
             # Map special keys for combinations too
             mapped_key = self.key_mapping.get(key, key.lower())
-            logger.debug(f"Processing key combination: {'+'.join(keys + [mapped_key])}")
-            
             keys.append(mapped_key)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processing key combination: %s", '+'.join(keys))
             
             # Add delay before combination
             time.sleep(self.config["keyboard_settings"]["key_interval"])
@@ -255,18 +368,19 @@ class ComputerControl:
             
             # Ensure combination is processed
             time.sleep(self.config["keyboard_settings"]["key_interval"])
-            
-            logger.debug(f"Key combination completed: {'+'.join(keys)}")
             return True
         except Exception as e:
-            logger.error(f"Key combination error: {str(e)}")
+            logger.error("Key combination error: %s", e)
             return False
 
+    @tracer.traced("type_text", "input")
+    @_input_action
     def type_text(self, text: str) -> bool:
         """Type text"""
         try:
             pyautogui.PAUSE = self.config["keyboard_settings"]["type_delay"]
-            logger.debug(f"Typing text: {text}")
+            # Log only the length so typed content never ends up in the logs
+            logger.debug("Typing %d characters", len(text))
             
             # Type each character individually with delay
             for char in text:
@@ -276,13 +390,15 @@ class ComputerControl:
             
             return True
         except Exception as e:
-            logger.error(f"Type text error: {str(e)}")
+            logger.error("Type text error: %s", e)
             return False
 
     def get_cursor_position(self) -> Tuple[int, int]:
         """Get current cursor position"""
         return win32gui.GetCursorPos()
 
+    @tracer.traced("drag_mouse", "input")
+    @_input_action
     def drag_mouse(self, x: int, y: int) -> bool:
         """Click and drag to specified coordinates"""
         try:
@@ -0,0 +1,373 @@
+import argparse
+import functools
+import json
+import logging
+import os
+import secrets
+import struct
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import AuthenticationError, Client, Listener, answer_challenge, deliver_challenge
+from typing import Any, Dict, Optional
+from command_router import CommandRouter
+from computer_control import ComputerControl
+from tracing import tracer
+
+logger = logging.getLogger("windows-control.service")
+
+def runtime_dir() -> str:
+    """Per-user directory holding the socket and auth key"""
+    if sys.platform == "win32":
+        path = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "windows-control")
+    elif os.environ.get("XDG_RUNTIME_DIR"):
+        path = os.path.join(os.environ["XDG_RUNTIME_DIR"], "windows-control")
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"windows-control-{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if sys.platform != "win32":
+        # Refuse a directory another user created or can read in the shared temp dir
+        info = os.stat(path)
+        if info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise PermissionError(f"Insecure controller runtime directory: {path}")
+    return path
+
+
+def default_address() -> str:
+    """Per-user named pipe on Windows, Unix socket in the runtime directory elsewhere"""
+    if sys.platform == "win32":
+        return r"\\.\pipe\windows-control-" + os.environ.get("USERNAME", "default")
+    return os.path.join(runtime_dir(), "controller.sock")
+
+
+def load_authkey(create: bool = False) -> bytes:
+    """Read the shared secret both ends authenticate with, creating it if asked"""
+    path = os.path.join(runtime_dir(), "authkey")
+    if create:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(secrets.token_bytes(32))
+        except FileExistsError:
+            pass
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# Seconds a new connection gets to complete the auth handshake
+HANDSHAKE_TIMEOUT = 5.0
+
+# ComputerControl methods that report failure by returning False
+BOOL_METHODS = {
+    "mouse_move",
+    "mouse_click",
+    "double_click",
+    "mouse_up",
+    "drag_mouse",
+    "key_press",
+    "key_combination",
+    "type_text",
+    "reload_config"
+}
+
+# Frame methods whose results are handed over through shared memory instead of the pipe
+FRAME_METHODS = {"get_screen_frame", "get_foveated_frame"}
+
+# CommandRouter methods, run in the service so their spans land in its exported trace
+COMMAND_METHODS = {"run_bash", "run_powershell"}
+
+# ComputerControl methods front ends may call on the shared controller
+EXPOSED_METHODS = BOOL_METHODS | {
+    "get_screen_frame",
+    "get_foveated_frame",
+    "get_screen_size",
+    "get_cursor_position"
+}
+
+
+class FrameBuffer:
+    """Shared-memory slot holding the latest encoded screen frame.
+
+    Layout is an 8-byte sequence number, an 8-byte payload length, then the
+    payload. The single writer makes the sequence odd while writing, so readers
+    retry until they see the same even sequence before and after copying.
+    """
+
+    HEADER = struct.Struct("QQ")
+
+    def __init__(self, name: Optional[str] = None, size: int = 0, create: bool = False):
+        if create:
+            # Unique per service so a restart never collides with a segment clients still hold
+            self._shm = shared_memory.SharedMemory(
+                name=name or f"wc-frame-{secrets.token_hex(8)}", create=True, size=self.HEADER.size + size
+            )
+            self.HEADER.pack_into(self._shm.buf, 0, 0, 0)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            if os.name != "nt":
+                # Attaching registers the segment with this process's resource tracker, which would unlink it on exit
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+        self.name = self._shm.name
+        self.capacity = self._shm.size - self.HEADER.size
+
+    def write(self, data: bytes) -> bool:
+        """Publish a frame; returns False if it does not fit"""
+        if len(data) > self.capacity:
+            return False
+        buf = self._shm.buf
+        sequence, _ = self.HEADER.unpack_from(buf, 0)
+        self.HEADER.pack_into(buf, 0, sequence + 1, 0)
+        buf[self.HEADER.size:self.HEADER.size + len(data)] = data
+        self.HEADER.pack_into(buf, 0, sequence + 2, len(data))
+        return True
+
+    def read(self, attempts: int = 50) -> Optional[bytes]:
+        """Copy out the latest frame, or None if the writer kept it busy"""
+        buf = self._shm.buf
+        for _ in range(attempts):
+            sequence, length = self.HEADER.unpack_from(buf, 0)
+            if sequence % 2 == 0:
+                data = bytes(buf[self.HEADER.size:self.HEADER.size + length])
+                if self.HEADER.unpack_from(buf, 0)[0] == sequence:
+                    return data
+            time.sleep(0.001)
+        return None
+
+    def close(self, unlink: bool = False):
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+class _HandshakeConnection:
+    """Connection wrapper whose reads give up after a timeout, so a silent peer cannot stall the handshake"""
+
+    def __init__(self, conn, timeout: float):
+        self._conn = conn
+        self._timeout = timeout
+
+    def send_bytes(self, *args):
+        self._conn.send_bytes(*args)
+
+    def recv_bytes(self, *args):
+        if not self._conn.poll(self._timeout):
+            raise TimeoutError("Controller handshake timed out")
+        return self._conn.recv_bytes(*args)
+
+
+class ControllerServer:
+    """Single ComputerControl shared by every front end over a local IPC channel"""
+
+    def __init__(self, computer: ComputerControl, address: Optional[str] = None, watch_interval: float = 1.0):
+        self.computer = computer
+        self.router = CommandRouter()
+        self.address = address or default_address()
+        self.authkey = load_authkey(create=True)
+        self.watch_interval = watch_interval
+        self._ensure_not_running()
+        # Serializes input and capture so mouse state stays consistent across front ends
+        self._lock = threading.Lock()
+        # One slot per frame method, each large enough for a base64 JPEG of an uncompressed frame
+        width, height = computer.get_screen_size()
+        self.frames = {method: FrameBuffer(size=width * height * 4, create=True) for method in FRAME_METHODS}
+
+    def _ensure_not_running(self):
+        """Refuse to start over a live service; clear a crashed one's socket file"""
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except AuthenticationError:
+            raise RuntimeError(f"Another process is listening on {self.address}")
+        except OSError:
+            if sys.platform != "win32" and os.path.exists(self.address):
+                os.unlink(self.address)
+            return
+        raise RuntimeError(f"Controller service already running at {self.address}")
+
+    def _config_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.computer.config_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def watch_config(self):
+        """Poll the config file and apply changes live"""
+        last_mtime = self._config_mtime()
+        while True:
+            time.sleep(self.watch_interval)
+            mtime = self._config_mtime()
+            if mtime is not None and mtime != last_mtime:
+                last_mtime = mtime
+                with self._lock:
+                    self.computer.reload_config()
+
+    def dispatch(self, method: str, args: tuple, kwargs: Dict[str, Any]):
+        """Run one request and return a (status, result) reply"""
+        if method == "export_chrome_trace":
+            trace = tracer.export_chrome_trace()
+            if kwargs.get("clear"):
+                tracer.clear()
+            return "ok", trace
+        if method in COMMAND_METHODS:
+            # Commands do not touch input or capture, so they run outside the controller lock
+            return "ok", getattr(self.router, method)(*args, **kwargs)
+        if method not in EXPOSED_METHODS:
+            return "error", AttributeError(f"Unknown controller method: {method}")
+        inline = kwargs.pop("inline", False) if method in FRAME_METHODS else False
+        with self._lock:
+            result = getattr(self.computer, method)(*args, **kwargs)
+            if method in FRAME_METHODS and not inline:
+                # Foveated frames are dicts of base64 strings, so JSON keeps pickle out of shared memory
+                payload = result if isinstance(result, str) else json.dumps(result)
+                frames = self.frames[method]
+                if frames.write(payload.encode('utf-8')):
+                    return "frame", frames.name
+        return "ok", result
+
+    def handle_connection(self, conn):
+        """Authenticate one front end, then serve its requests until it disconnects"""
+        try:
+            # Done here rather than in Listener.accept so a bad peer only costs its own thread
+            handshake = _HandshakeConnection(conn, HANDSHAKE_TIMEOUT)
+            deliver_challenge(handshake, self.authkey)
+            answer_challenge(handshake, self.authkey)
+        except (AuthenticationError, EOFError, OSError) as e:
+            logger.warning("Rejected controller connection: %s", e)
+            conn.close()
+            return
+        try:
+            while True:
+                method, args, kwargs = conn.recv()
+                try:
+                    with tracer.span(method, "ipc"):
+                        reply = self.dispatch(method, args, kwargs)
+                except Exception as e:
+                    logger.error("Controller call %s failed: %s", method, e)
+                    reply = ("error", e)
+                conn.send(reply)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def serve_forever(self):
+        """Accept front end connections and watch the config file"""
+        threading.Thread(target=self.watch_config, daemon=True).start()
+        try:
+            # No authkey on the listener: the handshake runs per connection in handle_connection
+            with Listener(self.address) as listener:
+                logger.info("Controller service listening on %s", self.address)
+                while True:
+                    try:
+                        conn = listener.accept()
+                    except OSError as e:
+                        logger.warning("Failed to accept controller connection: %s", e)
+                        continue
+                    threading.Thread(target=self.handle_connection, args=(conn,), daemon=True).start()
+        finally:
+            for frames in self.frames.values():
+                frames.close(unlink=True)
+
+
+class ControllerClient:
+    """ComputerControl stand-in that forwards calls to the shared controller service"""
+
+    def __init__(self, address: Optional[str] = None):
+        self._address = address or default_address()
+        self._lock = threading.Lock()
+        self._frames = {}
+        self._conn = self._connect()
+
+    def _connect(self):
+        # Mutual challenge: neither side unpickles anything from a peer without the key
+        return Client(self._address, authkey=load_authkey())
+
+    def _request(self, message: tuple) -> tuple:
+        """Send one request, reconnecting once if the service restarted since the last call"""
+        with self._lock:
+            try:
+                if self._conn is None:
+                    raise ConnectionError("Not connected to the controller service")
+                self._conn.send(message)
+            except OSError:
+                # The request never reached the service, so resending it cannot repeat an action
+                if self._conn is not None:
+                    self._conn.close()
+                self._conn = None
+                self._conn = self._connect()
+                logger.info("Reconnected to controller service at %s", self._address)
+                self._conn.send(message)
+            try:
+                return self._conn.recv()
+            except (EOFError, OSError):
+                # The service went away mid-call; the action may have run, so it is not retried
+                self._conn.close()
+                self._conn = None
+                raise ConnectionError("Controller service disconnected during the call")
+
+    def _call(self, method: str, *args, **kwargs):
+        try:
+            status, result = self._request((method, args, kwargs))
+        except (OSError, AuthenticationError) as e:
+            logger.error("Controller call %s failed: %s", method, e)
+            # Match ComputerControl, whose actions return False and whose screenshots return the error text
+            if method in BOOL_METHODS:
+                return False
+            if method == "get_screen_frame":
+                return str(e)
+            if method in COMMAND_METHODS:
+                # Same shape CommandRouter returns when a command cannot be started
+                return {"output": "", "error": str(e), "return_code": -1}
+            raise
+        if status == "error":
+            raise result
+        if status == "frame":
+            return self._read_frame(method, result)
+        return result
+
+    def _read_frame(self, method: str, name: str):
+        # Attach on first use and again whenever a restarted service publishes a new segment
+        frames = self._frames.get(method)
+        if frames is None or frames.name != name:
+            if frames is not None:
+                frames.close()
+            frames = self._frames[method] = FrameBuffer(name)
+        data = frames.read()
+        if data is None:
+            # Shared slot stayed busy; fetch this frame over the pipe instead
+            return self._call(method, inline=True)
+        payload = data.decode('utf-8')
+        return payload if method == "get_screen_frame" else json.loads(payload)
+
+    def export_chrome_trace(self, clear: bool = False) -> dict:
+        """Fetch spans recorded inside the controller service"""
+        return self._call("export_chrome_trace", clear=clear)
+
+    def __getattr__(self, name: str):
+        if name not in EXPOSED_METHODS and name not in COMMAND_METHODS:
+            raise AttributeError(name)
+        return functools.partial(self._call, name)
+
+
+def connect_controller(address: Optional[str] = None):
+    """Connect to the shared controller service, or fall back to an in-process controller"""
+    try:
+        return ControllerClient(address)
+    except (OSError, AuthenticationError) as e:
+        logger.warning("Controller service unavailable (%s), using an in-process controller", e)
+        return ComputerControl()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared computer controller for the API and MCP front ends")
+    parser.add_argument("--watch-interval", type=float, default=1.0,
+                        help="Seconds between config file checks")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        server = ControllerServer(ComputerControl(), watch_interval=args.watch_interval)
+    except RuntimeError as e:
+        logger.error("%s", e)
+        sys.exit(1)
+    server.serve_forever()
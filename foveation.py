@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+import cv2
+import numpy as np
+
+# Box geometry is (x, y, width, height) in full-resolution screen pixels
+Box = Tuple[int, int, int, int]
+
+DEFAULT_SETTINGS = {
+    "base_scale": 0.25,        # Downscale factor for the full-screen base layer
+    "base_quality": 30,        # JPEG quality of the base layer
+    "patch_size": 512,         # Side of the square patch around the cursor
+    "patch_quality": 85,       # JPEG quality of full-resolution patches
+    "max_change_size": 1024,   # Changed regions larger than this are cropped around their center
+    "change_threshold": 25,    # Per-pixel grayscale difference counted as a change
+    "change_scale": 8          # Downscale factor used when diffing frames
+}
+
+
+def encode_jpeg(frame: np.ndarray, quality: int) -> str:
+    """Encode a BGR frame as base64 JPEG"""
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return base64.b64encode(buffer).decode('utf-8')
+
+
+def clip_box(cx: int, cy: int, width: int, height: int,
+             screen_width: int, screen_height: int) -> Box:
+    """Center a width x height box on (cx, cy), shifted to stay on screen"""
+    width = min(width, screen_width)
+    height = min(height, screen_height)
+    x = max(0, min(cx - width // 2, screen_width - width))
+    y = max(0, min(cy - height // 2, screen_height - height))
+    return x, y, width, height
+
+
+def change_signature(frame: np.ndarray, scale: int) -> np.ndarray:
+    """Reduce a BGR frame to the small grayscale image used for change detection"""
+    height, width = frame.shape[:2]
+    # INTER_LINEAR is an order of magnitude cheaper than INTER_AREA at these ratios
+    small = cv2.resize(frame, (max(1, width // scale), max(1, height // scale)),
+                       interpolation=cv2.INTER_LINEAR)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+def find_changed_region(previous: Optional[np.ndarray], current: np.ndarray,
+                        scale: int, threshold: int) -> Optional[Box]:
+    """Bounding box of pixels that differ between two change signatures"""
+    if previous is None or previous.shape != current.shape:
+        return None
+    changed = cv2.absdiff(previous, current) > threshold
+    rows = np.flatnonzero(changed.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(changed.any(axis=0))
+    x, y = int(cols[0]) * scale, int(rows[0]) * scale
+    return x, y, (int(cols[-1]) + 1) * scale - x, (int(rows[-1]) + 1) * scale - y
+
+
+def _contains(outer: Box, inner: Box) -> bool:
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ox <= ix and oy <= iy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+
+def encode_foveated(frame: np.ndarray, cursor: Tuple[int, int],
+                    changed: Optional[Box] = None,
+                    settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Encode a low-quality base layer plus full-quality patches at cursor and change"""
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    screen_height, screen_width = frame.shape[:2]
+
+    # Low-resolution, low-quality base layer of the whole screen
+    scale = settings["base_scale"]
+    base_width = max(1, int(screen_width * scale))
+    base_height = max(1, int(screen_height * scale))
+    base = cv2.resize(frame, (base_width, base_height), interpolation=cv2.INTER_LINEAR)
+
+    # Full-resolution patch around the cursor
+    patch_size = settings["patch_size"]
+    boxes: List[Tuple[str, Box]] = [
+        ("cursor", clip_box(cursor[0], cursor[1], patch_size, patch_size,
+                            screen_width, screen_height))
+    ]
+
+    # Full-resolution patch over the most recent change, unless the cursor patch covers it
+    if changed is not None:
+        x, y, width, height = changed
+        max_size = settings["max_change_size"]
+        change_box = clip_box(x + width // 2, y + height // 2,
+                              min(width, max_size), min(height, max_size),
+                              screen_width, screen_height)
+        if not _contains(boxes[0][1], change_box):
+            boxes.append(("change", change_box))
+
+    patches = []
+    for kind, (x, y, width, height) in boxes:
+        patches.append({
+            "kind": kind,
+            "x": x,
+            "y": y,
+            "width": width,
+            "height": height,
+            "image": encode_jpeg(frame[y:y + height, x:x + width], settings["patch_quality"])
+        })
+
+    return {
+        "base": encode_jpeg(base, settings["base_quality"]),
+        "base_width": base_width,
+        "base_height": base_height,
+        "width": screen_width,
+        "height": screen_height,
+        "patches": patches
+    }
@@ -1,8 +1,9 @@
 import logging
 import asyncio
+from typing import Union
 from mcp.server import Server
 import mcp.types as types
-from computer_control import ComputerControl
+from controller_service import ControllerClient, connect_controller
 from command_router import CommandRouter
 
 # Configure logging
@@ -11,8 +12,9 @@ logger = logging.getLogger("windows-control")
 
 # Initialize server and components
 server = Server("windows-control")
-computer = ComputerControl()
-router = CommandRouter()
+computer = connect_controller()
+# Run commands in the controller service when connected, so GET /trace can export their spans
+router = computer if isinstance(computer, ControllerClient) else CommandRouter()
 
 @server.call_tool()
 async def execute_command(command: str) -> list[types.TextContent]:
@@ -24,10 +26,14 @@ async def execute_command(command: str) -> list[types.TextContent]:
     return [types.TextContent(type="text", text=result)]
 
 @server.call_tool()
-async def get_screen() -> list[types.ImageContent]:
+async def get_screen() -> list[Union[types.ImageContent, types.TextContent]]:
     """Capture the current screen state"""
     frame = computer.get_screen_frame()
-    screen_size = computer.get_screen_size()
+    try:
+        screen_size = computer.get_screen_size()
+    except Exception as e:
+        logger.error("Failed to get screen size: %s", e)
+        return [types.TextContent(type="text", text="Failed to capture screen")]
     return [types.ImageContent(
         type="image",
         image=frame,
@@ -37,6 +43,40 @@ async def get_screen() -> list[types.ImageContent]:
         }
     )]
 
+@server.call_tool()
+async def get_foveated_screen() -> list[Union[types.ImageContent, types.TextContent]]:
+    """Capture the screen as a low-quality base layer plus full-quality
+    patches around the cursor and the most recently changed region"""
+    try:
+        frame = computer.get_foveated_frame()
+    except Exception as e:
+        logger.error("Failed to capture foveated screen: %s", e)
+        return [types.TextContent(type="text", text="Failed to capture screen")]
+    images = [types.ImageContent(
+        type="image",
+        image=frame["base"],
+        metadata={
+            "kind": "base",
+            "width": frame["width"],
+            "height": frame["height"],
+            "base_width": frame["base_width"],
+            "base_height": frame["base_height"]
+        }
+    )]
+    for patch in frame["patches"]:
+        images.append(types.ImageContent(
+            type="image",
+            image=patch["image"],
+            metadata={
+                "kind": patch["kind"],
+                "x": patch["x"],
+                "y": patch["y"],
+                "width": patch["width"],
+                "height": patch["height"]
+            }
+        ))
+    return images
+
 @server.call_tool()
 async def mouse_move(coordinate: str) -> list[types.TextContent]:
     """Move the mouse cursor to specified coordinates"""
@@ -54,11 +94,14 @@ async def mouse_move(coordinate: str) -> list[types.TextContent]:
 async def mouse_click() -> list[types.TextContent]:
     """Perform a mouse click at the current cursor position"""
     success = computer.mouse_click()
-    pos = computer.get_cursor_position()
-    if success:
-        return [types.TextContent(type="text", text=f"Clicked at {pos[0]},{pos[1]}")]
-    else:
+    if not success:
         return [types.TextContent(type="text", text="Failed to click")]
+    try:
+        pos = computer.get_cursor_position()
+    except Exception as e:
+        logger.error("Failed to get cursor position: %s", e)
+        return [types.TextContent(type="text", text="Clicked at current position")]
+    return [types.TextContent(type="text", text=f"Clicked at {pos[0]},{pos[1]}")]
 
 @server.call_tool()
 async def type_text(text: str) -> list[types.TextContent]:
@@ -81,5 +124,9 @@ async def key_press(key: str) -> list[types.TextContent]:
 @server.call_tool()
 async def get_cursor_position() -> list[types.TextContent]:
     """Get the current cursor position"""
-    pos = computer.get_cursor_position()
+    try:
+        pos = computer.get_cursor_position()
+    except Exception as e:
+        logger.error("Failed to get cursor position: %s", e)
+        return [types.TextContent(type="text", text="Failed to get cursor position")]
     return [types.TextContent(type="text", text=f"Cursor at {pos[0]},{pos[1]}")]
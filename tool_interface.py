@@ -1,12 +1,12 @@
 from typing import Dict, Any, Optional, List, Union
-from computer_control import ComputerControl
+from controller_service import connect_controller
 import json
 
 class ComputerTools:
     """Tools for controlling computer input/output"""
     
     def __init__(self):
-        self.computer = ComputerControl()
+        self.computer = connect_controller()
 
     def get_tool_definitions(self) -> Dict[str, Dict[str, Any]]:
         """Return the tool definitions in a format compatible with LLM tool use"""
@@ -119,8 +119,11 @@ class ComputerTools:
             return {"success": success}
 
         elif tool_name == "get_screen_info":
-            size = self.computer.get_screen_size()
-            pos = self.computer.get_cursor_position()
+            try:
+                size = self.computer.get_screen_size()
+                pos = self.computer.get_cursor_position()
+            except Exception as e:
+                return {"error": f"Failed to get screen info: {e}"}
             return {
                 "screen_width": size[0],
                 "screen_height": size[1],
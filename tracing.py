@@ -0,0 +1,92 @@
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Tracer:
+    """Low-overhead span recorder backed by a bounded in-memory ring buffer.
+
+    Spans are stored as raw tuples and only turned into Chrome/Perfetto trace
+    events when exported, so recording a span costs two clock reads and a
+    deque append. Once the buffer is full the oldest spans are dropped.
+    """
+
+    def __init__(self, capacity: int = 10000, enabled: bool = True):
+        self.enabled = enabled
+        self._events = deque(maxlen=capacity)
+        self._pid = os.getpid()
+
+    @property
+    def capacity(self) -> int:
+        return self._events.maxlen
+
+    def configure(self, enabled: Optional[bool] = None, capacity: Optional[int] = None):
+        """Update tracer settings, keeping the most recent spans on resize"""
+        if enabled is not None:
+            self.enabled = enabled
+        if capacity is not None and capacity != self._events.maxlen:
+            self._events = deque(self._events, maxlen=capacity)
+
+    def record(self, name: str, category: str, start_ns: int, end_ns: int,
+               args: Optional[Dict[str, Any]] = None):
+        """Record a completed span with perf_counter_ns timestamps"""
+        self._events.append(
+            (name, category, start_ns, end_ns - start_ns, threading.get_ident(), args)
+        )
+
+    @contextmanager
+    def span(self, name: str, category: str = "control", **args):
+        """Time the enclosed block as a single span"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.perf_counter_ns(), args or None)
+
+    def traced(self, name: str, category: str = "control") -> Callable:
+        """Decorator recording one span per call of the wrapped function"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, category, start, time.perf_counter_ns())
+            return wrapper
+        return decorator
+
+    def clear(self):
+        """Drop all recorded spans"""
+        self._events.clear()
+
+    def export_chrome_trace(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return recorded spans in Chrome/Perfetto trace event format"""
+        events = []
+        for name, category, start_ns, dur_ns, tid, args in list(self._events):
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start_ns / 1000,
+                "dur": dur_ns / 1000,
+                "pid": self._pid,
+                "tid": tid
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+# Process-wide tracer shared by the control, API and MCP layers
+tracer = Tracer()